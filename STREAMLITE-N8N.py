@@ -12,7 +12,13 @@ from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph,
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 import json
+import os
 import re
+import hashlib
+import threading
+import sqlite3
+from contextlib import closing
+import numpy as np
 from PIL import Image
 
 # Configuración de la página
@@ -125,18 +131,19 @@ def parsear_clave(clave_str):
         st.error(f"❌ Error al parsear clave: {e}")
         return None
 
+# Función para convertir el PDF a imágenes
+def convertir_pdf_a_imagenes(pdf_bytes):
+    """Convierte las primeras 5 páginas del PDF a imágenes"""
+    return convert_from_bytes(pdf_bytes, dpi=150, first_page=1, last_page=5)
+
 # Función para extraer respuestas con Gemini
-def extraer_respuestas_gemini(model, pdf_file, num_preguntas):
-    """Extrae respuestas del PDF usando Gemini Vision"""
+def extraer_respuestas_gemini(model, imagenes, num_preguntas):
+    """Extrae respuestas de las páginas del PDF usando Gemini Vision.
+
+    Retorna (respuestas, completa): completa es False si alguna página no se pudo leer"""
     try:
-        # Resetear puntero del archivo
-        pdf_file.seek(0)
-        
-        # Convertir PDF a imágenes
-        pdf_bytes = pdf_file.read()
-        imagenes = convert_from_bytes(pdf_bytes, dpi=150, first_page=1, last_page=5)
-        
         respuestas = {}
+        completa = True
         
         # Procesar cada página con Gemini
         for idx, imagen in enumerate(imagenes):
@@ -188,17 +195,141 @@ NO incluyas explicaciones, solo el JSON puro."""
                             if respuesta_valor in ['a', 'b', 'c', 'd', 'e', 'v', 'f']:
                                 respuestas[num_pregunta] = respuesta_valor
                     except json.JSONDecodeError:
+                        completa = False
                         continue
+                else:
+                    completa = False
                         
             except Exception as e:
                 st.warning(f"⚠️ Error en página {idx+1}: {str(e)[:100]}")
+                completa = False
                 continue
         
-        return respuestas
+        return respuestas, completa
         
     except Exception as e:
         st.error(f"❌ Error al procesar PDF: {e}")
-        return {}
+        return {}, False
+
+# ==================== DEDUPLICACIÓN ENTRE SESIONES ====================
+
+# Segundos máximos que se espera la extracción en curso de otra sesión
+ESPERA_MAXIMA_EXTRACCION = 120
+# Lado de la cuadrícula usada para la huella perceptual de cada página
+LADO_HUELLA = 128
+# Desplazamiento máximo (en celdas) que se prueba para alinear dos escaneos
+DESPLAZAMIENTO_HUELLA = 2
+# Diferencia de gris fuera del rango de las celdas vecinas a partir de la cual
+# una celda cuenta como distinta. Comparar contra las vecinas absorbe el
+# corrimiento de un re-escaneo menor a una celda; una burbuja rellena o una X
+# queda más oscura que cualquier vecina de la otra hoja
+TOLERANCIA_HUELLA_GRIS = 32
+# Celdas distintas toleradas por página (p. ej. una mota de polvo)
+UMBRAL_HUELLA_CELDAS = 1
+
+@st.cache_resource
+def obtener_registro_extracciones():
+    """Registro de extracciones en curso compartido por todas las sesiones del servidor"""
+    return {
+        'lock': threading.Lock(),
+        'en_curso': {}  # sha256 del PDF -> extracción en curso
+    }
+
+# Función para calcular la huella perceptual de una página
+def calcular_huella_pagina(imagen):
+    """Reduce la página a LADO_HUELLA x LADO_HUELLA celdas de gris medio,
+    centradas en el tono del papel para tolerar cambios de brillo"""
+    gris = imagen.convert('L').resize((LADO_HUELLA, LADO_HUELLA), Image.Resampling.BOX)
+    pixeles = np.asarray(gris, dtype=np.int16)
+    return pixeles - np.int16(np.median(pixeles))
+
+# Función para calcular el rango de gris de las celdas vecinas
+def calcular_envolvente_huella(huella):
+    """Retorna el mínimo y el máximo de cada celda y sus 8 vecinas"""
+    borde = np.pad(huella, 1, mode='edge')
+    vecinas = [borde[1 + dy:1 + dy + LADO_HUELLA, 1 + dx:1 + dx + LADO_HUELLA]
+               for dy in (-1, 0, 1) for dx in (-1, 0, 1)]
+    return np.minimum.reduce(vecinas), np.maximum.reduce(vecinas)
+
+# Función para contar las celdas de una página que no aparecen en otra
+def contar_celdas_fuera(huella, referencia):
+    """Cuenta las celdas de huella fuera del rango de sus vecinas en referencia,
+    con la mejor alineación dentro de DESPLAZAMIENTO_HUELLA celdas"""
+    d = DESPLAZAMIENTO_HUELLA
+    minimo, maximo = calcular_envolvente_huella(referencia)
+    minimo = minimo[d:-d, d:-d] - TOLERANCIA_HUELLA_GRIS
+    maximo = maximo[d:-d, d:-d] + TOLERANCIA_HUELLA_GRIS
+    mejor = None
+    for dy in range(-d, d + 1):
+        for dx in range(-d, d + 1):
+            desplazada = np.roll(huella, (dy, dx), axis=(0, 1))[d:-d, d:-d]
+            fuera = np.count_nonzero((desplazada < minimo) | (desplazada > maximo))
+            mejor = fuera if mejor is None else min(mejor, fuera)
+    return mejor
+
+# Función para contar las celdas distintas entre dos páginas
+def contar_celdas_distintas(huella_a, huella_b):
+    """Cuenta en ambos sentidos: una marca presente solo en una hoja es distinta"""
+    return max(contar_celdas_fuera(huella_a, huella_b), contar_celdas_fuera(huella_b, huella_a))
+
+# Función para decidir si dos PDFs son casi idénticos
+def son_casi_identicos(huellas_a, huellas_b):
+    """Compara página a página las huellas de dos PDFs"""
+    if not huellas_a or len(huellas_a) != len(huellas_b):
+        return False
+    return all(contar_celdas_distintas(a, b) <= UMBRAL_HUELLA_CELDAS
+               for a, b in zip(huellas_a, huellas_b))
+
+# Función para extraer respuestas compartiendo el trabajo entre sesiones
+def extraer_respuestas_deduplicadas(model, pdf_bytes, clave_sha, num_preguntas):
+    """Extrae respuestas del PDF; si otra sesión está extrayendo los mismos bytes,
+    espera y reutiliza esa extracción en curso en lugar de llamar a Gemini.
+
+    Retorna (respuestas, compartida, huellas): compartida indica si se reutilizó
+    la extracción de otra sesión (en ese caso huellas es None)."""
+    registro = obtener_registro_extracciones()
+
+    # Si otra sesión ya procesa los mismos bytes, esperar su resultado
+    propietario = False
+    while True:
+        with registro['lock']:
+            entrada = registro['en_curso'].get(clave_sha)
+            if entrada is None:
+                entrada = {'evento': threading.Event(), 'respuestas': None}
+                registro['en_curso'][clave_sha] = entrada
+                propietario = True
+                break
+        if not entrada['evento'].wait(ESPERA_MAXIMA_EXTRACCION):
+            # La otra sesión no responde: extraer en esta sesión
+            break
+        if entrada['respuestas'] is not None:
+            return dict(entrada['respuestas']), True, None
+        # La otra sesión no obtuvo todas las páginas: reintentar
+
+    try:
+        try:
+            imagenes = convertir_pdf_a_imagenes(pdf_bytes)
+        except Exception as e:
+            st.error(f"❌ Error al procesar PDF: {e}")
+            imagenes = []
+
+        huellas = [calcular_huella_pagina(imagen) for imagen in imagenes]
+        if imagenes:
+            respuestas, completa = extraer_respuestas_gemini(model, imagenes, num_preguntas)
+        else:
+            respuestas, completa = {}, False
+
+        # Solo se comparte una extracción completa; si falló alguna página,
+        # las sesiones en espera la repiten y ven su propio error
+        if propietario and completa:
+            entrada['respuestas'] = respuestas
+    finally:
+        if propietario:
+            with registro['lock']:
+                registro['en_curso'].pop(clave_sha, None)
+            entrada['evento'].set()
+
+    return dict(respuestas), False, huellas
 
 # Función para calcular nota
 def calcular_nota(respuestas_alumno, clave_correcta, escala=20):
@@ -335,6 +466,173 @@ def generar_reporte_pdf(resultados, curso_nombre, curso_codigo, clave):
     buffer.seek(0)
     return buffer
 
+# ==================== HISTORIAL DE RESULTADOS ====================
+
+# Base de datos local con el historial de corridas calificadas, junto al script
+RUTA_HISTORIAL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "historial_calificaciones.db")
+
+ESQUEMA_HISTORIAL = """
+CREATE TABLE IF NOT EXISTS corridas (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    curso_codigo TEXT NOT NULL,
+    curso_nombre TEXT,
+    fecha TEXT NOT NULL,
+    version_clave TEXT NOT NULL,
+    huella_lote TEXT NOT NULL,
+    clave_json TEXT NOT NULL,
+    total_preguntas INTEGER NOT NULL,
+    total_alumnos INTEGER NOT NULL,
+    promedio REAL,
+    aprobados INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_corridas_curso_fecha
+    ON corridas (curso_codigo, fecha);
+CREATE INDEX IF NOT EXISTS idx_corridas_curso_version
+    ON corridas (curso_codigo, version_clave, fecha);
+CREATE INDEX IF NOT EXISTS idx_corridas_curso_version_lote
+    ON corridas (curso_codigo, version_clave, huella_lote);
+
+CREATE TABLE IF NOT EXISTS resultados_alumno (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    corrida_id INTEGER NOT NULL REFERENCES corridas (id),
+    nombre_pdf TEXT NOT NULL,
+    sha256 TEXT,
+    nota REAL NOT NULL,
+    correctas INTEGER NOT NULL,
+    incorrectas INTEGER NOT NULL,
+    duplicado_de TEXT,
+    similar_a TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_resultados_corrida
+    ON resultados_alumno (corrida_id);
+
+CREATE TABLE IF NOT EXISTS aciertos_pregunta (
+    corrida_id INTEGER NOT NULL REFERENCES corridas (id),
+    pregunta INTEGER NOT NULL,
+    respondidas INTEGER NOT NULL,
+    correctas INTEGER NOT NULL,
+    PRIMARY KEY (corrida_id, pregunta)
+) WITHOUT ROWID;
+"""
+
+# Función para abrir una conexión al historial
+def conectar_historial():
+    """Abre una conexión nueva (sqlite3 no comparte conexiones entre hilos)"""
+    conexion = sqlite3.connect(RUTA_HISTORIAL, timeout=30)
+    conexion.execute("PRAGMA foreign_keys = ON")
+    return conexion
+
+@st.cache_resource
+def inicializar_historial():
+    """Crea las tablas e índices del historial una sola vez por servidor"""
+    with closing(conectar_historial()) as conexion:
+        # WAL permite leer el historial mientras otra sesión guarda una corrida
+        conexion.execute("PRAGMA journal_mode = WAL")
+        conexion.executescript(ESQUEMA_HISTORIAL)
+    return RUTA_HISTORIAL
+
+# Función para identificar la versión de una clave de respuestas
+def calcular_version_clave(clave):
+    """Retorna un identificador corto y estable de la clave de respuestas"""
+    clave_normalizada = json.dumps(sorted(clave.items()))
+    return hashlib.sha256(clave_normalizada.encode('utf-8')).hexdigest()[:12]
+
+# Función para guardar una corrida calificada en el historial
+def guardar_corrida(resultados, curso_nombre, curso_codigo, clave):
+    """Guarda la corrida con sus estadísticas y aciertos por pregunta ya agregados,
+    de modo que el historial se consulte sin recorrer cada examen.
+
+    Las copias repetidas de un PDF no cuentan en las estadísticas, y volver a guardar
+    el mismo lote de PDFs con la misma clave reemplaza la corrida anterior."""
+    inicializar_historial()
+
+    version_clave = calcular_version_clave(clave)
+    huella_lote = hashlib.sha256(
+        ','.join(sorted(r['sha256'] for r in resultados)).encode('utf-8')
+    ).hexdigest()
+
+    # Estadísticas sin contar las copias repetidas de un mismo PDF en el lote
+    unicos = []
+    vistos = set()
+    for r in resultados:
+        if r['sha256'] not in vistos:
+            vistos.add(r['sha256'])
+            unicos.append(r)
+    notas = [r['nota'] for r in unicos]
+    aprobados = sum(1 for nota in notas if nota >= 14)
+    promedio = sum(notas) / len(notas) if notas else None
+
+    # Aciertos por pregunta de toda la corrida
+    aciertos = {num: [0, 0] for num in clave}
+    for r in unicos:
+        for num, resp_correcta in clave.items():
+            if num in r['respuestas']:
+                aciertos[num][0] += 1
+                if r['respuestas'][num] == resp_correcta:
+                    aciertos[num][1] += 1
+
+    with closing(conectar_historial()) as conexion, conexion:
+        # Reemplazar una corrida previa del mismo lote
+        anteriores = [fila[0] for fila in conexion.execute(
+            "SELECT id FROM corridas WHERE curso_codigo = ? AND version_clave = ? AND huella_lote = ?",
+            (curso_codigo, version_clave, huella_lote)
+        )]
+        for tabla in ('aciertos_pregunta', 'resultados_alumno'):
+            conexion.executemany(f"DELETE FROM {tabla} WHERE corrida_id = ?", [(i,) for i in anteriores])
+        conexion.executemany("DELETE FROM corridas WHERE id = ?", [(i,) for i in anteriores])
+
+        cursor = conexion.execute(
+            """INSERT INTO corridas (curso_codigo, curso_nombre, fecha, version_clave, huella_lote, clave_json,
+                                     total_preguntas, total_alumnos, promedio, aprobados)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            (curso_codigo, curso_nombre, datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+             version_clave, huella_lote, json.dumps(clave), len(clave),
+             len(unicos), promedio, aprobados)
+        )
+        corrida_id = cursor.lastrowid
+        conexion.executemany(
+            """INSERT INTO resultados_alumno (corrida_id, nombre_pdf, sha256, nota, correctas, incorrectas,
+                                              duplicado_de, similar_a)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+            [(corrida_id, r['nombre_pdf'], r['sha256'], r['nota'], r['correctas'], r['incorrectas'],
+              r.get('duplicado_de'), r.get('similar_a'))
+             for r in resultados]
+        )
+        conexion.executemany(
+            "INSERT INTO aciertos_pregunta (corrida_id, pregunta, respondidas, correctas) VALUES (?, ?, ?, ?)",
+            [(corrida_id, num, respondidas, correctas) for num, (respondidas, correctas) in aciertos.items()]
+        )
+    return corrida_id
+
+# Función para cargar las corridas de un curso
+def cargar_corridas(curso_codigo):
+    """Retorna un DataFrame con una fila por corrida del curso, ordenado por fecha"""
+    inicializar_historial()
+    consulta = """SELECT id, fecha, version_clave, total_preguntas, total_alumnos, promedio,
+                         100.0 * aprobados / NULLIF(total_alumnos, 0) AS tasa_aprobacion
+                  FROM corridas
+                  WHERE curso_codigo = ?
+                  ORDER BY fecha"""
+    with closing(conectar_historial()) as conexion:
+        return pd.read_sql_query(consulta, conexion, params=[curso_codigo], parse_dates=['fecha'])
+
+# Función para cargar la dificultad por pregunta a lo largo del tiempo
+def cargar_dificultad_preguntas(curso_codigo, version_clave):
+    """Retorna el % de aciertos por pregunta y corrida de una versión de la clave
+    (filas: fecha, columnas: pregunta); solo dentro de una versión la pregunta N
+    es la misma pregunta en todas las corridas"""
+    inicializar_historial()
+    consulta = """SELECT c.fecha, a.pregunta,
+                         100.0 * a.correctas / NULLIF(c.total_alumnos, 0) AS porcentaje_aciertos
+                  FROM corridas c
+                  JOIN aciertos_pregunta a ON a.corrida_id = c.id
+                  WHERE c.curso_codigo = ? AND c.version_clave = ?"""
+    with closing(conectar_historial()) as conexion:
+        df = pd.read_sql_query(consulta, conexion, params=[curso_codigo, version_clave], parse_dates=['fecha'])
+    if df.empty:
+        return df
+    return df.pivot_table(index='fecha', columns='pregunta', values='porcentaje_aciertos')
+
 # ==================== INTERFAZ PRINCIPAL ====================
 
 st.sidebar.header("⚙️ Panel de Control")
@@ -445,6 +743,8 @@ if st.button("🚀 Analizar con n8n", disabled=not puede_analizar, type="primary
     
     resultados = []
     total_files = len(uploaded_files)
+    extracciones_lote = {}  # sha256 del PDF -> (nombre, respuestas) dentro de esta corrida
+    huellas_lote = []  # (nombre, huellas de páginas) de los PDFs de esta corrida
     
     for idx, pdf_file in enumerate(uploaded_files):
         # Actualizar progreso
@@ -455,9 +755,30 @@ if st.button("🚀 Analizar con n8n", disabled=not puede_analizar, type="primary
         # Simular procesamiento en n8n (delay visual)
         time.sleep(0.8)
         
-        # Extraer respuestas con Gemini
-        with st.spinner(f"🤖 Analizando con IA..."):
-            respuestas_alumno = extraer_respuestas_gemini(model, pdf_file, len(clave))
+        # Resetear puntero del archivo
+        pdf_file.seek(0)
+        pdf_bytes = pdf_file.read()
+        clave_sha = hashlib.sha256(pdf_bytes).hexdigest()
+        
+        # Extraer respuestas con Gemini (un PDF idéntico comparte la extracción)
+        duplicado_de, similar_a, compartida = None, None, False
+        if clave_sha in extracciones_lote:
+            duplicado_de, respuestas_guardadas = extracciones_lote[clave_sha]
+            respuestas_alumno = dict(respuestas_guardadas)
+        else:
+            with st.spinner(f"🤖 Analizando con IA..."):
+                respuestas_alumno, compartida, huellas = extraer_respuestas_deduplicadas(
+                    model, pdf_bytes, clave_sha, len(clave)
+                )
+            extracciones_lote[clave_sha] = (pdf_file.name, respuestas_alumno)
+            
+            # Marcar para revisión los PDFs casi idénticos a otro del lote
+            if huellas:
+                similar_a = next(
+                    (nombre for nombre, huellas_previas in huellas_lote if son_casi_identicos(huellas_previas, huellas)),
+                    None
+                )
+                huellas_lote.append((pdf_file.name, huellas))
         
         # Calcular nota
         nota, correctas, incorrectas = calcular_nota(respuestas_alumno, clave)
@@ -468,7 +789,11 @@ if st.button("🚀 Analizar con n8n", disabled=not puede_analizar, type="primary
             'nota': nota,
             'correctas': correctas,
             'incorrectas': incorrectas,
-            'respuestas': respuestas_alumno
+            'respuestas': respuestas_alumno,
+            'sha256': clave_sha,
+            'duplicado_de': duplicado_de,
+            'similar_a': similar_a,
+            'compartida': compartida
         })
         
         # Resetear el file pointer para uso futuro
@@ -488,8 +813,27 @@ if st.button("🚀 Analizar con n8n", disabled=not puede_analizar, type="primary
     st.session_state.curso_codigo = curso_codigo
     st.session_state.clave = clave
     
+    # Guardar la corrida en el historial del curso
+    try:
+        guardar_corrida(resultados, curso_nombre, curso_codigo, clave)
+    except sqlite3.Error as e:
+        inicializar_historial.clear()
+        st.warning(f"⚠️ No se pudo guardar la corrida en el historial: {e}")
+    
     st.balloons()
     st.success("🎉 **¡Análisis completado exitosamente!** Revisa los resultados abajo.")
+    
+    total_duplicados = sum(1 for r in resultados if r['duplicado_de'])
+    if total_duplicados > 0:
+        st.warning(f"🔁 **{total_duplicados} examen(es) duplicado(s)** dentro de este lote reutilizaron la extracción de otro PDF idéntico. Revisa la columna 'Duplicado de'.")
+    
+    total_similares = sum(1 for r in resultados if r['similar_a'])
+    if total_similares > 0:
+        st.warning(f"👀 **{total_similares} examen(es)** se parecen mucho a otro PDF de este lote. Se calificaron con su propia extracción; revisa la columna 'Similar a'.")
+    
+    total_compartidas = sum(1 for r in resultados if r['compartida'])
+    if total_compartidas > 0:
+        st.info(f"♻️ **{total_compartidas} examen(es)** reutilizaron una extracción idéntica que estaba en curso en otra sesión.")
 
 # PASO 4: Mostrar resultados
 if st.session_state.procesado and st.session_state.resultados:
@@ -583,6 +927,8 @@ if st.session_state.procesado and st.session_state.resultados:
     df_display['estado'] = df_display['nota'].apply(
         lambda x: '✅ Aprobado' if x >= 14 else '❌ Desaprobado'
     )
+    df_display['duplicado_de'] = df_resultados['duplicado_de'].fillna('')
+    df_display['similar_a'] = df_resultados['similar_a'].fillna('')
     df_display = df_display.sort_values('nota', ascending=False).reset_index(drop=True)
     df_display.index += 1
     
@@ -608,6 +954,12 @@ if st.session_state.procesado and st.session_state.resultados:
             ),
             "estado": st.column_config.TextColumn(
                 "Estado"
+            ),
+            "duplicado_de": st.column_config.TextColumn(
+                "Duplicado de 🔁"
+            ),
+            "similar_a": st.column_config.TextColumn(
+                "Similar a 👀"
             )
         }
     )
@@ -642,6 +994,97 @@ if st.session_state.procesado and st.session_state.resultados:
                     use_container_width=True
                 )
 
+# PASO 6: Historial del curso
+if curso_codigo:
+    try:
+        df_corridas = cargar_corridas(curso_codigo)
+    except sqlite3.Error as e:
+        # Volver a crear el esquema en la próxima recarga (p. ej. si se borró la base)
+        inicializar_historial.clear()
+        st.warning(f"⚠️ No se pudo leer el historial del curso: {e}")
+        df_corridas = None
+    
+    if df_corridas is not None and not df_corridas.empty:
+        st.markdown("---")
+        st.header("6️⃣ Historial del Curso")
+        
+        # Versiones de la clave, de la más reciente a la más antigua
+        versiones = df_corridas.sort_values('fecha', ascending=False)['version_clave'].unique().tolist()
+        version_seleccionada = st.selectbox(
+            "🔑 Versión de la clave:",
+            versiones + ['Todas'],
+            help="Compara solo corridas calificadas con la misma clave de respuestas"
+        )
+        if version_seleccionada != 'Todas':
+            df_corridas = df_corridas[df_corridas['version_clave'] == version_seleccionada]
+        
+        total_historico = df_corridas['total_alumnos'].sum()
+        
+        col_h1, col_h2, col_h3 = st.columns(3)
+        
+        with col_h1:
+            st.metric(
+                label="🗂️ Corridas Registradas", 
+                value=len(df_corridas),
+                help="Corridas guardadas para este curso"
+            )
+        
+        with col_h2:
+            if total_historico > 0:
+                promedio_historico = (df_corridas['promedio'] * df_corridas['total_alumnos']).sum() / total_historico
+                st.metric(
+                    label="📈 Promedio Histórico", 
+                    value=f"{promedio_historico:.2f}",
+                    help="Promedio de todos los estudiantes de todas las corridas (sin duplicados)"
+                )
+            else:
+                st.metric(label="📈 Promedio Histórico", value="N/A")
+        
+        with col_h3:
+            if total_historico > 0:
+                aprobacion_historica = (df_corridas['tasa_aprobacion'] * df_corridas['total_alumnos']).sum() / total_historico
+                st.metric(
+                    label="✅ Aprobación Histórica", 
+                    value=f"{aprobacion_historica:.1f}%",
+                    help="Porcentaje de estudiantes con nota >= 14 en todas las corridas (sin duplicados)"
+                )
+            else:
+                st.metric(label="✅ Aprobación Histórica", value="N/A")
+        
+        st.subheader("📈 Tendencia por Corrida")
+        st.line_chart(
+            df_corridas.set_index('fecha')[['promedio', 'tasa_aprobacion']],
+            use_container_width=True
+        )
+        
+        st.dataframe(
+            df_corridas.drop(columns=['id']),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "fecha": st.column_config.DatetimeColumn("Fecha", format="DD/MM/YYYY HH:mm"),
+                "version_clave": st.column_config.TextColumn("Versión Clave"),
+                "total_preguntas": st.column_config.NumberColumn("Preguntas", format="%d"),
+                "total_alumnos": st.column_config.NumberColumn("Estudiantes", format="%d"),
+                "promedio": st.column_config.NumberColumn("Promedio", format="%.2f"),
+                "tasa_aprobacion": st.column_config.NumberColumn("% Aprobados", format="%.1f%%")
+            }
+        )
+        
+        st.subheader("🎯 Dificultad por Pregunta (% de aciertos)")
+        if version_seleccionada == 'Todas':
+            st.info("ℹ️ Selecciona una versión de la clave: la pregunta N no es la misma pregunta en claves distintas.")
+        else:
+            try:
+                df_dificultad = cargar_dificultad_preguntas(curso_codigo, version_seleccionada)
+            except sqlite3.Error as e:
+                st.warning(f"⚠️ No se pudo leer la dificultad por pregunta: {e}")
+                df_dificultad = pd.DataFrame()
+            if not df_dificultad.empty:
+                df_dificultad.columns = [f"P{num}" for num in df_dificultad.columns]
+                st.line_chart(df_dificultad, use_container_width=True)
+                st.dataframe(df_dificultad.round(1), use_container_width=True)
+
 # Sidebar con información adicional
 with st.sidebar:
     st.markdown("---")